@@ -2,11 +2,41 @@ from fastapi import APIRouter
 from enum import Enum
 from fastapi.params import Query
 from src import database as db
+from src import singleflight
 import sqlalchemy
 
 router = APIRouter()
 
+# The ten characters with the most lines in the queried character's movie.
+TOP_CONVERSATIONS_SQL = """SELECT json_build_object(
+    'character_id', c2.character_id,
+    'character', c2.name,
+    'gender', c2.gender,
+    'number_of_lines_together', top_conversations.number_of_lines_together
+    ) AS top_conversations
+    FROM (
+    SELECT l2.character_id, COUNT(*) AS number_of_lines_together
+    FROM characters c1
+    JOIN lines l1 ON l1.character_id = c1.character_id
+    JOIN lines l2 ON l2.movie_id = l1.movie_id AND l2.character_id != 
+    c1.character_id
+    WHERE c1.character_id = :id
+    GROUP BY l2.character_id
+    ORDER BY number_of_lines_together DESC
+    LIMIT 10
+    ) AS top_conversations
+    JOIN characters c2 ON c2.character_id = top_conversations.character_id;
+    """
+
+CHARACTER_SQL = """SELECT characters.character_id, name, title, gender
+    FROM characters
+    JOIN movies on movies.movie_id = characters.movie_id
+    WHERE characters.character_id = :id
+    """
+
+
 @router.get("/characters/{id}", tags=["characters"])
+@singleflight.coalesce
 def get_character(id: int):
     """
     This endpoint returns a single character by its identifier. For each 
@@ -29,35 +59,9 @@ def get_character(id: int):
     with the
       originally queried character.
     """
-    top_convos = """SELECT json_build_object(
-    'character_id', c2.character_id,
-    'character', c2.name,
-    'gender', c2.gender,
-    'number_of_lines_together', top_conversations.number_of_lines_together
-    ) AS top_conversations
-    FROM (
-    SELECT l2.character_id, COUNT(*) AS number_of_lines_together
-    FROM characters c1
-    JOIN lines l1 ON l1.character_id = c1.character_id
-    JOIN lines l2 ON l2.movie_id = l1.movie_id AND l2.character_id != 
-    c1.character_id
-    WHERE c1.character_id = {}
-    GROUP BY l2.character_id
-    ORDER BY number_of_lines_together DESC
-    LIMIT 10
-    ) AS top_conversations
-    JOIN characters c2 ON c2.character_id = top_conversations.character_id;
-    """.format(id)
-
-    sql = """SELECT characters.character_id, name, title, gender
-    FROM characters
-    JOIN movies on movies.movie_id = characters.movie_id
-    WHERE characters.character_id = {}
-    """.format(id)
-
-    with db.engine.connect() as conn:
-        top = conn.execute(sqlalchemy.text(top_convos))
-        result = conn.execute(sqlalchemy.text(sql))
+    with db.read_connection() as conn:
+        top = conn.execute(sqlalchemy.text(TOP_CONVERSATIONS_SQL), {"id": id})
+        result = conn.execute(sqlalchemy.text(CHARACTER_SQL), {"id": id})
         json = []
         top_conversations = []
         for row in top:
@@ -82,6 +86,29 @@ class character_sort_options(str, Enum):
     number_of_lines = "number_of_lines"
 
 
+def list_characters_sql(sort):
+    """SQL for `list_characters`, bound with `name`, `b` (limit) and `c`."""
+    if sort == character_sort_options.character:
+        s_val = "name"
+    elif sort == character_sort_options.movie:
+        s_val = "movie_id"
+    elif sort == character_sort_options.number_of_lines:
+        s_val = "COUNT(lines.line_id) DESC"
+    else:
+        s_val = "characters.character_id ASC"
+
+    return """
+    SELECT characters.character_id, characters.name, characters.movie_id, 
+    count(lines.line_id)
+    FROM characters
+    JOIN lines ON lines.character_id = characters.character_id
+    WHERE name iLIKE :name
+    group by characters.character_id
+    ORDER BY {}
+    liMIT :b OFFSET :c
+    """.format(s_val)
+
+
 @router.get("/characters/", tags=["characters"])
 def list_characters(
     name: str = "",
@@ -113,31 +140,11 @@ def list_characters(
     specifies the
     number of results to skip before returning results.
     """
-    conn = db.engine.connect()
-
-    if sort == character_sort_options.character:
-        s_val = "name"
-    elif sort == character_sort_options.movie:
-        s_val = "movie_id"
-    elif sort == character_sort_options.number_of_lines:
-        s_val = "COUNT(lines.line_id) DESC"
-    else:
-        s_val = "characters.character_id ASC"
-
-    sql = """
-    SELECT characters.character_id, characters.name, characters.movie_id, 
-    count(lines.line_id)
-    FROM characters
-    JOIN lines ON lines.character_id = characters.character_id
-    WHERE name iLIKE '%{}%'
-    group by characters.character_id
-    ORDER BY {}
-    liMIT :b OFFSET :c
-    """.format(name, s_val)
+    sql = list_characters_sql(sort)
 
-    with db.engine.connect() as conn:
+    with db.read_connection() as conn:
         result = conn.execute(sqlalchemy.text(sql),  
-                              [{"b": limit, "c": offset}])
+                              [{"name": f"%{name}%", "b": limit, "c": offset}])
         json = []
         for row in result:
             json.append(
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from src import database as db
+from src import graph
+from src import vocabulary
+import sqlalchemy
 from pydantic import BaseModel
 from typing import List
 
@@ -18,6 +21,28 @@ class ConversationJson(BaseModel):
 
 router = APIRouter()
 
+CHARACTERS_SQL = """
+SELECT character_id, movie_id
+FROM characters
+WHERE character_id = ANY(:ids)
+"""
+
+INSERT_CONVERSATION_SQL = """
+INSERT INTO conversations (conversation_id, character1_id, character2_id, movie_id)
+SELECT COALESCE(MAX(conversation_id), -1) + 1, :c1, :c2, :movie_id
+FROM conversations
+RETURNING conversation_id
+"""
+
+INSERT_LINE_SQL = """
+INSERT INTO lines (line_id, character_id, movie_id, conversation_id, line_sort,
+    line_text)
+SELECT COALESCE(MAX(line_id), -1) + 1, :character_id, :movie_id,
+    :conversation_id, :line_sort, :line_text
+FROM lines
+RETURNING line_id
+"""
+
 
 @router.post("/movies/{movie_id}/conversations/", tags=["movies"])
 def add_conversation(movie_id: int, conversation: ConversationJson):
@@ -36,27 +61,42 @@ def add_conversation(movie_id: int, conversation: ConversationJson):
     The endpoint returns the id of the resulting conversation that was created.
     """
 
-    # TODO: Remove the following two lines. This is just a placeholder to show
-    # how you could implement persistent storage.
-    char1 = db.characters.get(conversation.character_1_id)
-    char2 = db.characters.get(conversation.character_2_id)
-    if not char1 or not char2:
-        raise HTTPException(status_code=404, detail="character not found.")
-    if char1 == char2:
-        raise HTTPException(status_code=400, 
-            detail="conversation must contain unique characters.")
-    for line in conversation.lines:
-        if line.character_id != char1.id and line.character_id != char2.id:
+    with db.engine.begin() as conn:
+        # Serializes concurrent writers, so two conversations can never be
+        # given the same conversation or line ids.
+        conn.execute(sqlalchemy.text(
+            "LOCK TABLE conversations, lines IN SHARE ROW EXCLUSIVE MODE"))
+        movie_ids = dict(conn.execute(sqlalchemy.text(CHARACTERS_SQL), 
+            {"ids": [conversation.character_1_id, 
+                     conversation.character_2_id]}).fetchall())
+
+        char1 = conversation.character_1_id
+        char2 = conversation.character_2_id
+        if char1 not in movie_ids or char2 not in movie_ids:
+            raise HTTPException(status_code=404, detail="character not found.")
+        if char1 == char2:
             raise HTTPException(status_code=400, 
-            detail="lines contain unknown character.")
-    if(char1.movie_id != movie_id or 
-       char2.movie_id != movie_id):
-        raise HTTPException(status_code=400, detail="character not in movie.")
-
-    db.logs.append({"conversation_id" : db.conv_id, 
-                    "character1_id": conversation.character_1_id, 
-                    "character2_id": conversation.character_2_id, 
-                    "movie_id" : movie_id})
-    db.upload_new_log()
-    db.update_log()
-    return db.conv_id
+                detail="conversation must contain unique characters.")
+        for line in conversation.lines:
+            if line.character_id != char1 and line.character_id != char2:
+                raise HTTPException(status_code=400, 
+                detail="lines contain unknown character.")
+        if(movie_ids[char1] != movie_id or 
+           movie_ids[char2] != movie_id):
+            raise HTTPException(status_code=400, detail="character not in movie.")
+
+        conversation_id = conn.execute(sqlalchemy.text(INSERT_CONVERSATION_SQL), 
+            {"c1": char1, "c2": char2, "movie_id": movie_id}).scalar()
+        # One statement per line, since each takes the next id after the
+        # one inserted before it.
+        new_lines = []
+        for sort, line in enumerate(conversation.lines, start=1):
+            line_id = conn.execute(sqlalchemy.text(INSERT_LINE_SQL),
+                {"character_id": line.character_id, "movie_id": movie_id,
+                 "conversation_id": conversation_id, "line_sort": sort,
+                 "line_text": line.line_text}).scalar()
+            new_lines.append((line_id, line.character_id, line.line_text))
+
+    graph.invalidate()
+    vocabulary.add_lines(movie_id, new_lines)
+    return conversation_id
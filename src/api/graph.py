@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException
+from enum import Enum
+from fastapi.params import Query
+from src import graph as character_graph
+
+router = APIRouter()
+
+
+@router.get("/characters/{id}/neighbors", tags=["characters"])
+def get_neighbors(
+    id: int,
+    limit: int = Query(50, ge=1, le=250),
+):
+    """
+    This endpoint returns the characters a character has spoken with, built
+    from the conversations they share. For each neighbor it returns:
+    * `character_id`: the internal id of the character. Can be used to query
+      the `/characters/{character_id}` endpoint.
+    * `character`: The name of the character.
+    * `gender`: The gender of the character.
+    * `number_of_lines_together`: The number of lines spoken across all of
+      the conversations between the two characters.
+
+    Neighbors are ordered by `number_of_lines_together`, highest first. The
+    `limit` query parameter specifies the maximum number of results to return.
+    """
+    graph = character_graph.get_graph()
+    if id not in graph:
+        raise HTTPException(status_code=404, detail="character not found.")
+
+    json = []
+    for node, weight in graph.neighbors(id)[:limit]:
+        neighbor = graph.character(node)
+        neighbor["number_of_lines_together"] = weight
+        json.append(neighbor)
+    return json
+
+
+@router.get("/movies/{movie_id}/path", tags=["movies"])
+def get_path(movie_id: int, source: int, target: int):
+    """
+    This endpoint returns the shortest chain of conversations linking two
+    characters of the same movie. It returns:
+    * `movie_id`: the internal id of the movie.
+    * `length`: The number of conversations hops between the two characters.
+    * `path`: The characters along the chain, starting with `source` and
+      ending with `target`. Each character is represented by its
+      `character_id`, `character` and `gender`.
+    """
+    graph = character_graph.get_graph()
+    for character_id in (source, target):
+        if character_id not in graph:
+            raise HTTPException(status_code=404, detail="character not found.")
+        if graph.movie_of(character_id) != movie_id:
+            raise HTTPException(status_code=400, detail="character not in movie.")
+
+    path = graph.shortest_path(movie_id, source, target)
+    if path is None:
+        raise HTTPException(status_code=404, detail="characters are not connected.")
+
+    return {
+        "movie_id": movie_id,
+        "length": len(path) - 1,
+        "path": [graph.character(node) for node in path],
+    }
+
+
+class centrality_options(str, Enum):
+    degree = "degree"
+    weighted_degree = "weighted_degree"
+    closeness = "closeness"
+
+
+@router.get("/movies/{movie_id}/centrality", tags=["movies"])
+def get_centrality(
+    movie_id: int,
+    metric: centrality_options = centrality_options.degree,
+    limit: int = Query(10, ge=1, le=250),
+):
+    """
+    This endpoint ranks the characters of a movie by how central they are to
+    its conversations. For each character it returns:
+    * `character_id`: the internal id of the character.
+    * `character`: The name of the character.
+    * `gender`: The gender of the character.
+    * `score`: The centrality score of the character.
+
+    You can pick the ranking by using the `metric` query parameter:
+    * `degree` - Number of distinct characters spoken with.
+    * `weighted_degree` - Number of lines spoken in conversations.
+    * `closeness` - How few conversation hops separate the character from
+      everyone else in the movie.
+    """
+    graph = character_graph.get_graph()
+    if movie_id not in graph.movies:
+        raise HTTPException(status_code=404, detail="movie not found.")
+
+    json = []
+    for node, score in graph.centrality(movie_id, metric.value)[:limit]:
+        character = graph.character(node)
+        character["score"] = score
+        json.append(character)
+    return json
@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from src import warmup
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    """
+    Liveness check. Returns 200 as long as the process is serving requests;
+    it does not touch the database.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    """
+    Readiness check. Returns 503 until the startup warm-up has opened the
+    connection pool, run the hottest routes' queries and filled the caches,
+    then 200. The body reports how long the warm-up took, which optional
+    steps failed and, while not ready, which required step is being retried.
+    """
+    body = {
+        "ready": warmup.ready.is_set(),
+        "warmup_seconds": warmup.status["seconds"],
+        "failed_steps": warmup.status["failed_steps"],
+        "retrying": warmup.status["retrying"],
+    }
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from src import database as db
+from src import singleflight
+from src.ratelimit import limiter
+
+router = APIRouter()
+
+
+@router.get("/metrics/")
+def get_metrics():
+    """
+    This endpoint returns in-process counters for the API's shared
+    infrastructure:
+    * `coalescing`: for each coalesced route, how many requests executed
+      their query and how many were `coalesced` onto an identical request
+      that was already in flight.
+    * `replica`: whether a read replica is configured and healthy, and how
+      many reads went to the `replica` or the `primary`, and how many
+      `failovers` to the primary happened because the replica was down.
+    * `rate_limit`: whether rate limiting is enabled and how many requests
+      were `rejected` for exceeding their `rate` or `concurrency` limit.
+    """
+    return {
+        "coalescing": singleflight.group.stats(),
+        "replica": db.replica_stats(),
+        "rate_limit": limiter.stats(),
+    }
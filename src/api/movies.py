@@ -1,30 +1,15 @@
 from fastapi import APIRouter
 from enum import Enum
 from src import database as db
+from src import singleflight
 from fastapi.params import Query
 import sqlalchemy
 
 router = APIRouter()
 
-
-@router.get("/movies/{movie_id}", tags=["movies"])
-def get_movie(movie_id: int):
-    """
-    This endpoint returns a single movie by its identifier. For each movie it 
-    returns:
-    * `movie_id`: the internal id of the movie.
-    * `title`: The title of the movie.
-    * `top_characters`: A list of characters that are in the movie. The 
-      characters are ordered by the number of lines they have in the movie. 
-      The top five characters are listed.
-
-    Each character is represented by a dictionary with the following keys:
-    * `character_id`: the internal id of the character.
-    * `character`: The name of the character.
-    * `num_lines`: The number of lines the character has in the movie.
-
-    """
-    sql = """
+# Lines are counted for this movie only, so the lookup stays on the
+# lines.movie_id index instead of aggregating the whole table.
+MOVIE_SQL = """
     SELECT 
     movies.movie_id, 
     movies.title, 
@@ -47,6 +32,8 @@ def get_movie(movie_id: int):
                             COUNT(*) AS num_lines 
                         FROM 
                             lines 
+                        WHERE 
+                            lines.movie_id = (:movie_id)
                         GROUP BY 
                             character_id
                     ) AS lines ON lines.character_id = characters.character_id 
@@ -63,9 +50,28 @@ def get_movie(movie_id: int):
     WHERE 
     movies.movie_id = (:movie_id);"""
 
+
+@router.get("/movies/{movie_id}", tags=["movies"])
+@singleflight.coalesce
+def get_movie(movie_id: int):
+    """
+    This endpoint returns a single movie by its identifier. For each movie it 
+    returns:
+    * `movie_id`: the internal id of the movie.
+    * `title`: The title of the movie.
+    * `top_characters`: A list of characters that are in the movie. The 
+      characters are ordered by the number of lines they have in the movie. 
+      The top five characters are listed.
+
+    Each character is represented by a dictionary with the following keys:
+    * `character_id`: the internal id of the character.
+    * `character`: The name of the character.
+    * `num_lines`: The number of lines the character has in the movie.
+
+    """
     # print(stmt)
-    with db.engine.connect() as conn:
-        result = conn.execute(sqlalchemy.text(sql), 
+    with db.read_connection() as conn:
+        result = conn.execute(sqlalchemy.text(MOVIE_SQL), 
                               [{"movie_id": movie_id}]).fetchone()
         json = []
         json.append(
@@ -84,6 +90,37 @@ class movie_sort_options(str, Enum):
     rating = "rating"
 
 
+def list_movies_stmt(name, limit, offset, sort):
+    """Core statement behind `list_movies`."""
+    if sort is movie_sort_options.movie_title:
+        order_by = db.movies.c.title
+    elif sort is movie_sort_options.year:
+        order_by = db.movies.c.year
+    elif sort is movie_sort_options.rating:
+        order_by = sqlalchemy.desc(db.movies.c.imdb_rating)
+    else:
+        assert False
+
+    stmt = (
+        sqlalchemy.select(
+            db.movies.c.movie_id,
+            db.movies.c.title,
+            db.movies.c.year,
+            db.movies.c.imdb_rating,
+            db.movies.c.imdb_votes,
+        )
+        .limit(limit)
+        .offset(offset)
+        .order_by(order_by, db.movies.c.movie_id)
+    )
+
+    # filter only if name parameter is passed
+    if name != "":
+        stmt = stmt.where(db.movies.c.title.ilike(f"%{name}%"))
+
+    return stmt
+
+
 # Add get parameters
 @router.get("/movies/", tags=["movies"])
 def list_movies(
@@ -114,33 +151,9 @@ def list_movies(
     maximum number of results to return. The `offset` query parameter specifies the
     number of results to skip before returning results.
     """
-    if sort is movie_sort_options.movie_title:
-        order_by = db.movies.c.title
-    elif sort is movie_sort_options.year:
-        order_by = db.movies.c.year
-    elif sort is movie_sort_options.rating:
-        order_by = sqlalchemy.desc(db.movies.c.imdb_rating)
-    else:
-        assert False
-
-    stmt = (
-        sqlalchemy.select(
-            db.movies.c.movie_id,
-            db.movies.c.title,
-            db.movies.c.year,
-            db.movies.c.imdb_rating,
-            db.movies.c.imdb_votes,
-        )
-        .limit(limit)
-        .offset(offset)
-        .order_by(order_by, db.movies.c.movie_id)
-    )
-
-    # filter only if name parameter is passed
-    if name != "":
-        stmt = stmt.where(db.movies.c.title.ilike(f"%{name}%"))
+    stmt = list_movies_stmt(name, limit, offset, sort)
 
-    with db.engine.connect() as conn:
+    with db.read_connection() as conn:
         result = conn.execute(stmt)
         json = []
         for row in result:
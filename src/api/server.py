@@ -1,5 +1,10 @@
-from fastapi import FastAPI
-from src.api import characters, movies, lines, pkg_util, conversations
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from src import database as db
+from src import warmup
+from src.ratelimit import EXEMPT_PATHS, limiter
+from src.api import characters, movies, lines, pkg_util, conversations, graph, metrics
+from src.api import health, vocabulary
 
 description = """
 Movie API returns dialog statistics on top hollywood movies from decades past.
@@ -9,12 +14,17 @@ Movie API returns dialog statistics on top hollywood movies from decades past.
 You can:
 * **list characters with sorting and filtering options.**
 * **retrieve a specific character by id**
+* **list the characters a character has spoken with**
+* **list the words and phrases a character uses most**
 
 ## Movies
 
 You can:
 * **list movies with sorting and filtering options.**
 * **retrieve a specific movie by id**
+* **find the shortest conversation path between two characters**
+* **rank characters by centrality**
+* **list the words and phrases used most in a movie**
 """
 tags_metadata = [
     {
@@ -50,6 +60,60 @@ app.include_router(movies.router)
 app.include_router(lines.router)
 app.include_router(pkg_util.router)
 app.include_router(conversations.router)
+app.include_router(graph.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
+app.include_router(vocabulary.router)
+
+
+@app.on_event("startup")
+def start_warmup():
+    warmup.start()
+
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    # GET requests read from the replica unless the client wrote recently;
+    # a successful write pins the client to the primary.
+    client = request.client.host if request.client else None
+    if request.method in ("GET", "HEAD"):
+        token = db.prefer_primary.set(db.is_sticky(client))
+        try:
+            return await call_next(request)
+        finally:
+            db.prefer_primary.reset(token)
+
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        db.mark_write(client)
+    return response
+
+
+# Registered after route_reads so it runs first and rejected requests never
+# reach the database.
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    path = request.url.path
+    if not limiter.enabled or path in EXEMPT_PATHS:
+        return await call_next(request)
+
+    client = request.client.host if request.client else "unknown"
+    retry_after = await limiter.admit_async(
+        client, request.method, path, request.query_params
+    )
+    if retry_after is not None:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "too many requests."},
+            headers={"Retry-After": str(retry_after)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        await limiter.release_async(client)
 
 
 @app.get("/")
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.params import Query
+from src import database as db
+from src import vocabulary
+import sqlalchemy
+
+router = APIRouter()
+
+EMPTY = {"terms": [], "bigrams": []}
+
+
+def exists(sql, id):
+    with db.read_connection() as conn:
+        return conn.execute(sqlalchemy.text(sql), {"id": id}).first() is not None
+
+
+@router.get("/characters/{id}/vocabulary", tags=["characters"])
+def get_character_vocabulary(
+    id: int,
+    limit: int = Query(10, ge=1, le=100),
+    include_stopwords: bool = False,
+):
+    """
+    This endpoint returns the words and phrases a character uses most. It
+    returns:
+    * `character_id`: the internal id of the character.
+    * `terms`: The most frequent words, each with its `term` and `count`.
+    * `bigrams`: The most frequent pairs of consecutive words, each with its
+      `bigram` and `count`.
+
+    The `limit` query parameter specifies the maximum number of terms and
+    bigrams to return. Common words such as "the" or "you" are left out
+    unless `include_stopwords` is set. A character without any lines gets
+    empty lists.
+    """
+    index = vocabulary.get_index()
+    top = index.top(index.characters, id, limit, include_stopwords)
+    if top is None:
+        if not exists("SELECT 1 FROM characters WHERE character_id = :id", id):
+            raise HTTPException(status_code=404, detail="character not found.")
+        top = EMPTY
+    return {"character_id": id, **top}
+
+
+@router.get("/movies/{movie_id}/vocabulary", tags=["movies"])
+def get_movie_vocabulary(
+    movie_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    include_stopwords: bool = False,
+):
+    """
+    This endpoint returns the words and phrases used most in a movie. It
+    returns:
+    * `movie_id`: the internal id of the movie.
+    * `terms`: The most frequent words, each with its `term` and `count`.
+    * `bigrams`: The most frequent pairs of consecutive words, each with its
+      `bigram` and `count`.
+
+    The `limit` query parameter specifies the maximum number of terms and
+    bigrams to return. Common words such as "the" or "you" are left out
+    unless `include_stopwords` is set. A movie without any lines gets empty
+    lists.
+    """
+    index = vocabulary.get_index()
+    top = index.top(index.movies, movie_id, limit, include_stopwords)
+    if top is None:
+        if not exists("SELECT 1 FROM movies WHERE movie_id = :id", movie_id):
+            raise HTTPException(status_code=404, detail="movie not found.")
+        top = EMPTY
+    return {"movie_id": movie_id, **top}
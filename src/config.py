@@ -0,0 +1,34 @@
+import os
+import dotenv
+
+
+def database_connection_url():
+    dotenv.load_dotenv()
+    DB_USER: str = os.environ.get("POSTGRES_USER")
+    DB_PASSWD = os.environ.get("POSTGRES_PASSWORD")
+    DB_SERVER: str = os.environ.get("POSTGRES_SERVER")
+    DB_PORT: str = os.environ.get("POSTGRES_PORT")
+    DB_NAME: str = os.environ.get("POSTGRES_DB")
+    return f"postgresql://{DB_USER}:{DB_PASSWD}@{DB_SERVER}:{DB_PORT}/{DB_NAME}"
+
+
+def replica_connection_url():
+    """
+    Connection string for the read-only replica, or None when
+    POSTGRES_REPLICA_SERVER is not set. Any other POSTGRES_REPLICA_* value
+    that is missing falls back to its primary POSTGRES_* counterpart.
+    """
+    dotenv.load_dotenv()
+    DB_SERVER: str = os.environ.get("POSTGRES_REPLICA_SERVER")
+    if not DB_SERVER:
+        return None
+
+    def setting(name):
+        primary = os.environ.get("POSTGRES_" + name)
+        return os.environ.get("POSTGRES_REPLICA_" + name, primary)
+
+    DB_USER: str = setting("USER")
+    DB_PASSWD = setting("PASSWORD")
+    DB_PORT: str = setting("PORT")
+    DB_NAME: str = setting("DB")
+    return f"postgresql://{DB_USER}:{DB_PASSWD}@{DB_SERVER}:{DB_PORT}/{DB_NAME}"
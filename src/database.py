@@ -1,19 +1,98 @@
-import sqlalchemy
+import contextlib
+import contextvars
 import os
-import dotenv
+import threading
+import time
 
-def database_connection_url():
-    dotenv.load_dotenv()
-    DB_USER: str = os.environ.get("POSTGRES_USER")
-    DB_PASSWD = os.environ.get("POSTGRES_PASSWORD")
-    DB_SERVER: str = os.environ.get("POSTGRES_SERVER")
-    DB_PORT: str = os.environ.get("POSTGRES_PORT")
-    DB_NAME: str = os.environ.get("POSTGRES_DB")
-    return f"postgresql://{DB_USER}:{DB_PASSWD}@{DB_SERVER}:{DB_PORT}/{DB_NAME}"
+import sqlalchemy
+from src.config import database_connection_url, replica_connection_url
 
 # Create a new DB engine based on our connection string
 engine = sqlalchemy.create_engine(database_connection_url())
 
+# Optional read-only replica that GET routes read from. Writes always go to
+# the primary `engine`.
+replica_url = replica_connection_url()
+read_engine = (
+    sqlalchemy.create_engine(replica_url, pool_pre_ping=True) if replica_url else None
+)
+
+# How long a client keeps reading from the primary after a write, so that it
+# sees its own changes despite replication lag.
+STICKY_SECONDS = float(os.environ.get("POSTGRES_REPLICA_STICKY_SECONDS", "5"))
+# How long an unreachable replica is skipped before it is tried again.
+RETRY_SECONDS = float(os.environ.get("POSTGRES_REPLICA_RETRY_SECONDS", "30"))
+
+# Set per request by the server middleware.
+prefer_primary = contextvars.ContextVar("prefer_primary", default=False)
+
+_lock = threading.Lock()
+_sticky_until = {}
+_replica_down_until = 0.0
+_replica_counts = {"replica": 0, "primary": 0, "failovers": 0}
+
+
+def mark_write(client):
+    """Pins `client`'s reads to the primary for STICKY_SECONDS."""
+    now = time.monotonic()
+    with _lock:
+        if len(_sticky_until) > 10000:
+            for key in [k for k, t in _sticky_until.items() if t <= now]:
+                del _sticky_until[key]
+        _sticky_until[client] = now + STICKY_SECONDS
+
+
+def is_sticky(client):
+    with _lock:
+        until = _sticky_until.get(client)
+        if until is not None and until <= time.monotonic():
+            del _sticky_until[client]
+            until = None
+    return until is not None
+
+
+def replica_healthy():
+    return read_engine is not None and time.monotonic() >= _replica_down_until
+
+
+def _count(target):
+    with _lock:
+        _replica_counts[target] += 1
+
+
+@contextlib.contextmanager
+def read_connection():
+    """
+    Connection for read-only queries. Uses the replica when one is configured
+    and healthy and the current request is not pinned to the primary;
+    otherwise, or if the replica cannot be reached, uses the primary.
+    """
+    global _replica_down_until
+    conn = None
+    if replica_healthy() and not prefer_primary.get():
+        try:
+            conn = read_engine.connect()
+            _count("replica")
+        except sqlalchemy.exc.OperationalError:
+            with _lock:
+                _replica_down_until = time.monotonic() + RETRY_SECONDS
+            _count("failovers")
+    if conn is None:
+        conn = engine.connect()
+        _count("primary")
+    with conn:
+        yield conn
+
+
+def replica_stats():
+    with _lock:
+        return {
+            "configured": read_engine is not None,
+            "healthy": replica_healthy(),
+            "reads": dict(_replica_counts),
+        }
+
+
 # Use reflection to derive table schema. You can also code this in manually.
 metadata_obj = sqlalchemy.MetaData()
 movies = sqlalchemy.Table("movies", metadata_obj, autoload_with=engine)
@@ -22,4 +101,4 @@ lines = sqlalchemy.Table("lines", metadata_obj, autoload_with=engine)
 
 characters = sqlalchemy.Table("characters", metadata_obj, autoload_with=engine)
 
-conversations = sqlalchemy.Table("conversations", metadata_obj, autoload_with=engine)
\ No newline at end of file
+conversations = sqlalchemy.Table("conversations", metadata_obj, autoload_with=engine)
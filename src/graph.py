@@ -0,0 +1,217 @@
+import threading
+from array import array
+from collections import deque
+
+import sqlalchemy
+
+from src import database as db
+
+# Every character, so that characters without any conversations still show up
+# as isolated nodes of their movie.
+CHARACTERS_SQL = """
+SELECT character_id, name, movie_id, gender
+FROM characters
+ORDER BY character_id
+"""
+
+# One row per pair of characters that talked to each other, weighted by the
+# number of lines spoken across all of their conversations.
+EDGES_SQL = """
+SELECT conversations.character1_id, conversations.character2_id,
+    COUNT(lines.line_id) AS num_lines
+FROM conversations
+LEFT JOIN lines ON lines.conversation_id = conversations.conversation_id
+GROUP BY conversations.character1_id, conversations.character2_id
+"""
+
+
+class CharacterGraph:
+    """
+    Undirected, line-weighted character interaction graph stored in CSR form.
+
+    Nodes are numbered 0..n-1 in character_id order. The neighbours of node
+    `i` are `indices[indptr[i]:indptr[i + 1]]` with the matching entries of
+    `weights` holding the number of lines the two characters exchanged. Each
+    row is sorted by weight, highest first.
+    """
+
+    def __init__(self, characters, edges):
+        self.character_ids = array("q")
+        self.names = []
+        self.genders = []
+        self.movie_ids = array("q")
+        self.index = {}
+        self.movies = {}
+
+        for character_id, name, movie_id, gender in characters:
+            node = len(self.character_ids)
+            self.index[character_id] = node
+            self.character_ids.append(character_id)
+            self.names.append(name)
+            self.genders.append(gender)
+            self.movie_ids.append(movie_id)
+            self.movies.setdefault(movie_id, array("q")).append(node)
+
+        # Merge (a, b) and (b, a) rows into a single undirected edge.
+        pairs = {}
+        for c1, c2, num_lines in edges:
+            a = self.index.get(c1)
+            b = self.index.get(c2)
+            if a is None or b is None or a == b:
+                continue
+            key = (a, b) if a < b else (b, a)
+            pairs[key] = pairs.get(key, 0) + (num_lines or 0)
+
+        rows = [[] for _ in range(len(self.character_ids))]
+        for (a, b), weight in pairs.items():
+            rows[a].append((weight, b))
+            rows[b].append((weight, a))
+
+        self.indptr = array("q", [0])
+        self.indices = array("q")
+        self.weights = array("q")
+        for row in rows:
+            row.sort(key=lambda edge: (-edge[0], edge[1]))
+            for weight, neighbor in row:
+                self.indices.append(neighbor)
+                self.weights.append(weight)
+            self.indptr.append(len(self.indices))
+
+        self._centrality = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, character_id):
+        return character_id in self.index
+
+    def character(self, node):
+        return {
+            "character_id": self.character_ids[node],
+            "character": self.names[node],
+            "gender": self.genders[node],
+        }
+
+    def movie_of(self, character_id):
+        return self.movie_ids[self.index[character_id]]
+
+    def _row(self, node):
+        return range(self.indptr[node], self.indptr[node + 1])
+
+    def _movie_row(self, movie_id, node):
+        # Edge positions of `node` whose neighbour belongs to `movie_id`, the
+        # same restriction shortest_path and closeness apply.
+        return [
+            i for i in self._row(node) if self.movie_ids[self.indices[i]] == movie_id
+        ]
+
+    def neighbors(self, character_id):
+        """Returns (node, weight) pairs, most lines together first."""
+        node = self.index[character_id]
+        return [(self.indices[i], self.weights[i]) for i in self._row(node)]
+
+    def shortest_path(self, movie_id, source_id, target_id):
+        """
+        Breadth-first search for the fewest-hops path between two characters,
+        restricted to characters of `movie_id`. Returns a list of nodes or
+        None when the characters are not connected.
+        """
+        source = self.index[source_id]
+        target = self.index[target_id]
+        parent = {source: source}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = [node]
+                while node != source:
+                    node = parent[node]
+                    path.append(node)
+                path.reverse()
+                return path
+            for i in self._row(node):
+                neighbor = self.indices[i]
+                if neighbor in parent or self.movie_ids[neighbor] != movie_id:
+                    continue
+                parent[neighbor] = node
+                queue.append(neighbor)
+        return None
+
+    def centrality(self, movie_id, metric):
+        """
+        Ranks the characters of a movie by `metric`, highest first. Rankings
+        are computed once per movie and metric and then served from memory.
+        """
+        key = (movie_id, metric)
+        with self._lock:
+            ranking = self._centrality.get(key)
+        if ranking is not None:
+            return ranking
+
+        nodes = self.movies.get(movie_id, ())
+        if metric == "degree":
+            scores = {n: len(self._movie_row(movie_id, n)) for n in nodes}
+        elif metric == "weighted_degree":
+            scores = {
+                n: sum(self.weights[i] for i in self._movie_row(movie_id, n))
+                for n in nodes
+            }
+        elif metric == "closeness":
+            scores = {n: self._closeness(movie_id, n, len(nodes)) for n in nodes}
+        else:
+            raise ValueError(f"unknown centrality metric: {metric}")
+
+        ranking = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        with self._lock:
+            self._centrality[key] = ranking
+        return ranking
+
+    def _closeness(self, movie_id, source, movie_size):
+        # Wasserman-Faust closeness, which stays comparable across the
+        # disconnected components most movie graphs break into.
+        if movie_size < 2:
+            return 0.0
+        distance = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for i in self._row(node):
+                neighbor = self.indices[i]
+                if neighbor in distance or self.movie_ids[neighbor] != movie_id:
+                    continue
+                distance[neighbor] = distance[node] + 1
+                queue.append(neighbor)
+        reachable = len(distance) - 1
+        total = sum(distance.values())
+        if total == 0:
+            return 0.0
+        return (reachable / total) * (reachable / (movie_size - 1))
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def load_graph():
+    """Builds a fresh CharacterGraph from the database."""
+    with db.engine.connect() as conn:
+        characters = conn.execute(sqlalchemy.text(CHARACTERS_SQL)).fetchall()
+        edges = conn.execute(sqlalchemy.text(EDGES_SQL)).fetchall()
+    return CharacterGraph(characters, edges)
+
+
+def get_graph():
+    """Returns the shared graph, building it on first use."""
+    global _graph
+    graph = _graph
+    if graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = load_graph()
+            graph = _graph
+    return graph
+
+
+def invalidate():
+    """Drops the shared graph so the next request rebuilds it."""
+    global _graph
+    with _graph_lock:
+        _graph = None
@@ -0,0 +1,272 @@
+"""
+Bulk loader for the movie corpus.
+
+    python -m src.load DATA_DIR [--truncate] [--chunk-size N] [--url URL]
+
+DATA_DIR holds one file per table named after it, either CSV with a header
+row (`movies.csv`) or newline-delimited JSON (`movies.ndjson`). CSV files are
+streamed into Postgres with COPY as they are; NDJSON rows are converted and
+sent in COPY chunks of `--chunk-size` rows. Afterwards the indexes the API
+routes rely on are (re)built and the tables analyzed. The connection defaults
+to the POSTGRES_* environment variables.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import psycopg2
+
+from src.config import database_connection_url
+
+# Tables in load order, so that parents exist before the rows pointing at them.
+SCHEMA = {
+    "movies": """
+        CREATE TABLE IF NOT EXISTS movies (
+            movie_id integer PRIMARY KEY,
+            title text,
+            year text,
+            imdb_rating real,
+            imdb_votes integer,
+            raw_script_url text
+        )""",
+    "characters": """
+        CREATE TABLE IF NOT EXISTS characters (
+            character_id integer PRIMARY KEY,
+            name text,
+            movie_id integer,
+            gender text,
+            age integer
+        )""",
+    "conversations": """
+        CREATE TABLE IF NOT EXISTS conversations (
+            conversation_id integer PRIMARY KEY,
+            character1_id integer,
+            character2_id integer,
+            movie_id integer
+        )""",
+    "lines": """
+        CREATE TABLE IF NOT EXISTS lines (
+            line_id integer PRIMARY KEY,
+            character_id integer,
+            movie_id integer,
+            conversation_id integer,
+            line_sort integer,
+            line_text text
+        )""",
+}
+
+# Secondary indexes used by the API routes. A --truncate reload drops them
+# first and rebuilds them afterwards, which is much cheaper than maintaining
+# them per row; a plain load into a live database leaves them in place.
+INDEXES = {
+    "characters_movie_id_idx": "characters (movie_id)",
+    "lines_character_id_idx": "lines (character_id)",
+    "lines_movie_id_idx": "lines (movie_id)",
+    "lines_conversation_id_idx": "lines (conversation_id)",
+    "conversations_movie_id_idx": "conversations (movie_id)",
+    "conversations_character1_id_idx": "conversations (character1_id)",
+    "conversations_character2_id_idx": "conversations (character2_id)",
+}
+
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+# Bytes handed to COPY at a time when streaming a CSV file.
+COPY_BLOCK_SIZE = 1 << 20
+
+
+def find_source(data_dir, table):
+    for extension, fmt in EXTENSIONS.items():
+        path = os.path.join(data_dir, table + extension)
+        if os.path.exists(path):
+            return path, fmt
+    return None, None
+
+
+def read_ndjson(f):
+    """
+    Returns the column names, the union of the keys of every record in first
+    seen order, and an iterator over the rows as lists of values. The file is
+    read twice, once for the keys and once for the rows, so it must be
+    seekable.
+    """
+    columns = {}
+    for line in f:
+        if line.strip():
+            columns.update(dict.fromkeys(json.loads(line)))
+    columns = list(columns)
+    f.seek(0)
+
+    def rows():
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield [record.get(column) for column in columns]
+
+    return columns, rows()
+
+
+def csv_value(value):
+    """
+    Formats one value for COPY ... FORMAT csv. Only None becomes a bare empty
+    field, which COPY reads as NULL; strings are always quoted, so an empty
+    string stays an empty string. Nested objects and arrays are written as
+    JSON.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def copy_table(cursor, table, path, fmt, chunk_size):
+    """Streams one file into `table` with COPY and returns the row count."""
+    # utf-8-sig drops a byte-order mark instead of leaving it glued to the
+    # first column name.
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            # The file already is COPY input, so it is streamed as is. That
+            # keeps COPY's own distinction between an empty field (NULL) and
+            # a quoted empty string.
+            header = next(csv.reader([f.readline()]), None)
+            if not header:
+                return 0
+            cursor.copy_expert(copy_sql(table, header), f, size=COPY_BLOCK_SIZE)
+            return cursor.rowcount
+
+        columns, rows = read_ndjson(f)
+        if not columns:
+            return 0
+        sql = copy_sql(table, columns)
+        count = 0
+        for chunk in chunks(rows, chunk_size):
+            buffer = io.StringIO()
+            for row in chunk:
+                buffer.write(",".join(csv_value(value) for value in row) + "\n")
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            count += len(chunk)
+        return count
+
+
+def copy_sql(table, columns):
+    return "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        table, ", ".join(columns)
+    )
+
+
+def build_indexes(conn):
+    with conn.cursor() as cursor:
+        for name, target in INDEXES.items():
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS {} ON {}".format(name, target)
+            )
+        for table in SCHEMA:
+            cursor.execute("ANALYZE {}".format(table))
+    conn.commit()
+
+
+def load(conn, data_dir, truncate=False, chunk_size=50000):
+    total_rows = 0
+    started = time.monotonic()
+
+    with conn.cursor() as cursor:
+        for ddl in SCHEMA.values():
+            cursor.execute(ddl)
+        if truncate:
+            for name in INDEXES:
+                cursor.execute("DROP INDEX IF EXISTS {}".format(name))
+            cursor.execute("TRUNCATE {}".format(", ".join(SCHEMA)))
+    conn.commit()
+
+    try:
+        for table in SCHEMA:
+            path, fmt = find_source(data_dir, table)
+            if path is None:
+                print(f"{table}: no source file, skipped")
+                continue
+
+            table_started = time.monotonic()
+            with conn.cursor() as cursor:
+                rows = copy_table(cursor, table, path, fmt, chunk_size)
+            conn.commit()
+            elapsed = time.monotonic() - table_started
+            total_rows += rows
+            print(
+                f"{table}: {rows} rows in {elapsed:.1f}s "
+                f"({rate(rows, elapsed)} rows/s)"
+            )
+    finally:
+        # Even when a COPY fails, leave the database with every index the
+        # routes need rather than falling back to sequential scans.
+        conn.rollback()
+        index_started = time.monotonic()
+        build_indexes(conn)
+        print(f"indexes built in {time.monotonic() - index_started:.1f}s")
+
+    elapsed = time.monotonic() - started
+    print(
+        f"total: {total_rows} rows in {elapsed:.1f}s "
+        f"({rate(total_rows, elapsed)} rows/s)"
+    )
+    return total_rows
+
+
+def rate(rows, elapsed):
+    return int(rows / elapsed) if elapsed > 0 else rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.load", description="Bulk load the movie corpus."
+    )
+    parser.add_argument("data_dir", help="directory with one file per table")
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="empty the tables before loading (reload)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=50000,
+        help="NDJSON rows sent per COPY (default: 50000)",
+    )
+    parser.add_argument(
+        "--url", help="database url (default: from POSTGRES_* variables)"
+    )
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(args.url or database_connection_url())
+    try:
+        load(conn, args.data_dir, args.truncate, args.chunk_size)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+import dotenv
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never limited: docs, the landing page and the load balancer
+# health checks.
+EXEMPT_PATHS = {"/", "/docs", "/redoc", "/openapi.json", "/health", "/ready"}
+
+LIST_PATH = re.compile(r"^/(movies|lines)/$")
+WRITE_PATH = re.compile(r"^/movies/\d+/conversations/$")
+
+
+def request_cost(method, path, query):
+    """
+    Number of tokens a request takes from its client's bucket. Detail lookups
+    are cheap; list endpoints cost more, and sorting characters by line count
+    aggregates the whole lines table, so it costs the most.
+    """
+    if path == "/characters/":
+        return 10 if query.get("sort") == "number_of_lines" else 3
+    if LIST_PATH.match(path) or path.startswith("/lines/bycharacter/"):
+        return 3
+    if method == "POST" and WRITE_PATH.match(path):
+        return 5
+    return 1
+
+
+class MemoryBackend:
+    """Token buckets and in-flight counters kept in this process."""
+
+    # Calls only take a lock, so they can run on the event loop.
+    blocking = False
+
+    # Seconds between sweeps that drop buckets which have refilled.
+    SWEEP_SECONDS = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._in_flight = {}
+        self._last_sweep = time.monotonic()
+
+    def _sweep(self, now, rate, burst):
+        # A bucket that has been idle long enough to refill is the same as no
+        # bucket at all, so dropping it keeps memory bounded by the clients
+        # active in the last sweep interval.
+        for client, (tokens, last) in list(self._buckets.items()):
+            if tokens + (now - last) * rate >= burst:
+                del self._buckets[client]
+        self._last_sweep = now
+
+    def take(self, client, cost, rate, burst):
+        """Returns 0 if `cost` tokens were taken, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.SWEEP_SECONDS:
+                self._sweep(now, rate, burst)
+            tokens, last = self._buckets.get(client, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= cost:
+                self._buckets[client] = (tokens - cost, now)
+                return 0
+            self._buckets[client] = (tokens, now)
+            return (cost - tokens) / rate
+
+    def acquire(self, client, limit):
+        with self._lock:
+            count = self._in_flight.get(client, 0)
+            if count >= limit:
+                return False
+            self._in_flight[client] = count + 1
+            return True
+
+    def release(self, client):
+        with self._lock:
+            count = self._in_flight.get(client, 1) - 1
+            if count > 0:
+                self._in_flight[client] = count
+            else:
+                self._in_flight.pop(client, None)
+
+
+# KEYS[1] bucket hash, ARGV: cost, rate, burst, now. Returns the wait in
+# milliseconds, 0 when the tokens were taken.
+TAKE_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local cost, rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]),
+    tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local last = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait
+"""
+
+
+class RedisBackend:
+    """
+    Token buckets and in-flight counters shared by every instance through
+    Redis. Requires the optional `redis` package.
+    """
+
+    # Every call is a network round-trip, so the middleware runs them in the
+    # thread pool instead of on the event loop.
+    blocking = True
+
+    def __init__(self, url, prefix="movie_api:ratelimit:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(TAKE_SCRIPT)
+        self._prefix = prefix
+
+    def take(self, client, cost, rate, burst):
+        key = self._prefix + "bucket:" + client
+        return self._take(keys=[key], args=[cost, rate, burst, time.time()]) / 1000
+
+    def acquire(self, client, limit):
+        key = self._prefix + "in_flight:" + client
+        pipe = self._redis.pipeline()
+        pipe.incr(key)
+        # Expire so counters of crashed instances do not pin clients forever.
+        pipe.expire(key, 60)
+        count, _ = pipe.execute()
+        if count > limit:
+            self._redis.decr(key)
+            return False
+        return True
+
+    def release(self, client):
+        self._redis.decr(self._prefix + "in_flight:" + client)
+
+
+def backend_from_env():
+    """
+    Redis backend when RATE_LIMIT_REDIS_URL is set, else the in-process one.
+    Without the `redis` package the limiter falls back to per-process limits
+    rather than keeping the app from starting.
+    """
+    redis_url = os.environ.get("RATE_LIMIT_REDIS_URL")
+    if not redis_url:
+        return MemoryBackend()
+    try:
+        return RedisBackend(redis_url)
+    except ImportError:
+        logger.error(
+            "RATE_LIMIT_REDIS_URL is set but the redis package is not "
+            "installed; rate limits are kept per process"
+        )
+        return MemoryBackend()
+
+
+class RateLimiter:
+    def __init__(self, backend, rate, burst, concurrency, enabled=True):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._rejected = {"rate": 0, "concurrency": 0}
+
+    @classmethod
+    def from_env(cls):
+        dotenv.load_dotenv()
+        return cls(
+            backend_from_env(),
+            rate=float(os.environ.get("RATE_LIMIT_RATE", "20")),
+            burst=float(os.environ.get("RATE_LIMIT_BURST", "60")),
+            concurrency=int(os.environ.get("RATE_LIMIT_CONCURRENCY", "4")),
+            enabled=os.environ.get("RATE_LIMIT_ENABLED", "1") != "0",
+        )
+
+    def admit(self, client, method, path, query):
+        """
+        Admits a request, returning None, or rejects it, returning the number
+        of seconds the client should wait before retrying. Admitted requests
+        must be passed to `release` once they finish.
+        """
+        # The concurrency cap is checked first so that a request it rejects
+        # does not also spend the client's rate budget.
+        if not self.backend.acquire(client, self.concurrency):
+            self._reject("concurrency")
+            return 1
+        cost = min(request_cost(method, path, query), self.burst)
+        wait = self.backend.take(client, cost, self.rate, self.burst)
+        if wait > 0:
+            self.backend.release(client)
+            self._reject("rate")
+            return max(1, math.ceil(wait))
+        return None
+
+    def release(self, client):
+        self.backend.release(client)
+
+    async def admit_async(self, client, method, path, query):
+        """`admit` for async callers; blocking backends run in a thread."""
+        if self.backend.blocking:
+            return await run_in_threadpool(self.admit, client, method, path, query)
+        return self.admit(client, method, path, query)
+
+    async def release_async(self, client):
+        if self.backend.blocking:
+            await run_in_threadpool(self.release, client)
+        else:
+            self.release(client)
+
+    def _reject(self, reason):
+        with self._lock:
+            self._rejected[reason] += 1
+
+    def stats(self):
+        with self._lock:
+            return {"enabled": self.enabled, "rejected": dict(self._rejected)}
+
+
+limiter = RateLimiter.from_env()
@@ -0,0 +1,83 @@
+import functools
+import threading
+
+from src import database as db
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution. The first
+    caller for a key runs the function; callers arriving while it is still in
+    flight wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            self._count(key[0], "coalesced" if not leader else "executed")
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _count(self, name, outcome):
+        counts = self._counts.setdefault(name, {"executed": 0, "coalesced": 0})
+        counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "routes": {name: dict(c) for name, c in self._counts.items()},
+            }
+
+
+group = SingleFlight()
+
+
+def coalesce(fn):
+    """
+    Decorator that routes calls through the shared SingleFlight group, keyed
+    on the function and its arguments. The wrapper keeps the signature of
+    `fn`, so it can sit directly under a FastAPI route decorator.
+
+    The key also records whether the request is pinned to the primary, so a
+    client reading its own writes never shares a replica read.
+    """
+    name = fn.__module__ + "." + fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())), db.prefer_primary.get())
+        return group.do(key, fn, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,200 @@
+import heapq
+import re
+import threading
+from collections import Counter
+
+import sqlalchemy
+
+from src import database as db
+
+LINES_SQL = """
+SELECT line_id, character_id, movie_id, line_text
+FROM lines
+"""
+
+# Letters and digits of any script, so accented words stay whole.
+TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+STOPWORDS = frozenset(
+    """
+    a about after all am an and any are as at be been but by can could did do
+    does don't for from get got had has have he her him his how i i'd i'll i'm
+    i've if in into is it it's its just know let me my no not now of oh on one
+    or our out say see she so some that that's the their them then there they
+    this to up us was we we're well were what when where who why will with
+    would yeah yes you you're your
+    """.split()
+)
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class _Counts:
+    __slots__ = ("terms", "bigrams")
+
+    def __init__(self):
+        self.terms = Counter()
+        self.bigrams = Counter()
+
+
+class VocabularyIndex:
+    """
+    Term and bigram frequencies per character and per movie. Each distinct
+    word is stored once and referred to by an integer id; a bigram is a
+    single int packing the ids of its two words.
+
+    `watermark` is the highest line_id already counted, so lines written
+    while the index was being built are not counted twice.
+    """
+
+    def __init__(self):
+        self.term_ids = {}
+        self.terms = []
+        self.characters = {}
+        self.movies = {}
+        self.watermark = -1
+        self._lock = threading.Lock()
+
+    def _term_id(self, term):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.term_ids[term] = term_id
+            self.terms.append(term)
+        return term_id
+
+    def add_line(self, character_id, movie_id, text):
+        with self._lock:
+            self._add_line(character_id, movie_id, text)
+
+    def add_lines(self, movie_id, lines):
+        """
+        Counts `(line_id, character_id, line_text)` rows of one movie, skipping
+        those at or below the watermark.
+        """
+        with self._lock:
+            for line_id, character_id, text in lines:
+                if line_id > self.watermark:
+                    self._add_line(character_id, movie_id, text)
+                    self.watermark = max(self.watermark, line_id)
+
+    def _add_line(self, character_id, movie_id, text):
+        tokens = tokenize(text)
+        if tokens:
+            ids = [self._term_id(token) for token in tokens]
+            bigrams = [(a << 32) | b for a, b in zip(ids, ids[1:])]
+            for owners, key in (
+                (self.characters, character_id),
+                (self.movies, movie_id),
+            ):
+                counts = owners.get(key)
+                if counts is None:
+                    counts = owners[key] = _Counts()
+                counts.terms.update(ids)
+                counts.bigrams.update(bigrams)
+
+    def _stopword(self, term_id):
+        return self.terms[term_id] in STOPWORDS
+
+    def top(self, owners, key, limit, include_stopwords=False):
+        """
+        Returns the `limit` most frequent terms and bigrams for one character
+        or movie, or None if it has no indexed lines. Unless
+        `include_stopwords` is set, stopwords and bigrams made only of
+        stopwords are skipped.
+        """
+        with self._lock:
+            counts = owners.get(key)
+            if counts is None:
+                return None
+            terms = list(counts.terms.items())
+            bigrams = list(counts.bigrams.items())
+
+        if not include_stopwords:
+            terms = [(t, n) for t, n in terms if not self._stopword(t)]
+            bigrams = [
+                (b, n)
+                for b, n in bigrams
+                if not (self._stopword(b >> 32) and self._stopword(b & 0xFFFFFFFF))
+            ]
+
+        def by_count(item):
+            return item[1]
+
+        return {
+            "terms": [
+                {"term": self.terms[t], "count": n}
+                for t, n in heapq.nlargest(limit, terms, key=by_count)
+            ],
+            "bigrams": [
+                {
+                    "bigram": self.terms[b >> 32] + " " + self.terms[b & 0xFFFFFFFF],
+                    "count": n,
+                }
+                for b, n in heapq.nlargest(limit, bigrams, key=by_count)
+            ],
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+# Lines written while the shared index is being built, as (movie_id, lines)
+# pairs; None when no build is running. Guarded by _pending_lock, which also
+# guards publishing _index so no write falls between the two.
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def load_index():
+    """Tokenizes every line in the database into a new VocabularyIndex."""
+    index = VocabularyIndex()
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, yield_per=10000)
+        result = conn.execute(sqlalchemy.text(LINES_SQL))
+        for row in result:
+            index.add_line(row.character_id, row.movie_id, row.line_text)
+            index.watermark = max(index.watermark, row.line_id)
+    return index
+
+
+def get_index():
+    """Returns the shared index, building it on first use."""
+    global _index, _pending
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                with _pending_lock:
+                    _pending = []
+                try:
+                    index = load_index()
+                finally:
+                    with _pending_lock:
+                        pending, _pending = _pending, None
+                        if index is not None:
+                            # Writes that committed after the build's
+                            # snapshot have line_ids above its watermark.
+                            for movie_id, lines in pending:
+                                index.add_lines(movie_id, lines)
+                            _index = index
+            index = _index
+    return index
+
+
+def add_lines(movie_id, lines):
+    """
+    Adds newly written `(line_id, character_id, line_text)` rows to the shared
+    index. While the index is being built they are queued for the build;
+    before the first build they are skipped, since it reads them from the
+    database.
+    """
+    with _pending_lock:
+        index = _index
+        if index is None:
+            if _pending is not None:
+                _pending.append((movie_id, lines))
+            return
+    index.add_lines(movie_id, lines)
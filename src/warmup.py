@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+
+import dotenv
+import sqlalchemy
+
+from src import database as db
+from src import graph
+from src import vocabulary
+from src.api import characters, movies
+
+logger = logging.getLogger(__name__)
+
+# Steps the instance cannot serve without. Until they succeed the warm-up
+# keeps retrying them and /ready stays at 503; every other step is
+# best-effort.
+REQUIRED_STEPS = {"pool"}
+
+ready = threading.Event()
+status = {"seconds": None, "failed_steps": [], "retrying": None}
+
+
+def settings():
+    dotenv.load_dotenv()
+    return {
+        "enabled": os.environ.get("WARMUP_ENABLED", "1") != "0",
+        "connections": int(
+            os.environ.get("WARMUP_CONNECTIONS", str(db.engine.pool.size()))
+        ),
+        "movie_ids": _ids(os.environ.get("WARMUP_MOVIE_IDS", "0,44")),
+        "character_ids": _ids(os.environ.get("WARMUP_CHARACTER_IDS", "0,2")),
+        "retry_seconds": float(os.environ.get("WARMUP_RETRY_SECONDS", "5")),
+    }
+
+
+def _ids(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def open_pool(engine, size):
+    """Checks out `size` connections at once so the pool keeps them open."""
+    connections = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(sqlalchemy.text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def steps(config):
+    yield "pool", lambda: open_pool(db.engine, config["connections"])
+    if db.read_engine is not None:
+        yield "replica pool", lambda: open_pool(db.read_engine, config["connections"])
+    for movie_id in config["movie_ids"]:
+        yield f"get_movie {movie_id}", lambda m=movie_id: movies.get_movie(m)
+    for character_id in config["character_ids"]:
+        yield (
+            f"get_character {character_id}",
+            lambda c=character_id: characters.get_character(c),
+        )
+    yield "list_movies", lambda: movies.list_movies(
+        "", 50, 0, movies.movie_sort_options.movie_title
+    )
+    for sort in characters.character_sort_options:
+        yield f"list_characters {sort.value}", lambda s=sort: (
+            characters.list_characters("", 50, 0, s)
+        )
+    yield "character graph", graph.get_graph
+    yield "vocabulary index", vocabulary.get_index
+
+
+def run(config=None):
+    """
+    Warms the instance up and then marks it ready. A required step that fails
+    is retried every `retry_seconds` until it succeeds, so an instance whose
+    database is unreachable never reports ready. Any other failing step is
+    logged and skipped, so a bad warm-up setting never keeps an instance out
+    of rotation.
+    """
+    config = config or settings()
+    status["failed_steps"] = []
+    started = time.monotonic()
+    if config["enabled"]:
+        for name, step in steps(config):
+            while True:
+                try:
+                    step()
+                    break
+                except Exception:
+                    logger.exception("warm-up step %s failed", name)
+                    if name not in REQUIRED_STEPS:
+                        status["failed_steps"].append(name)
+                        break
+                    status["retrying"] = name
+                    time.sleep(config["retry_seconds"])
+            status["retrying"] = None
+    status["seconds"] = round(time.monotonic() - started, 3)
+    ready.set()
+
+
+def start():
+    """Runs the warm-up in the background so liveness checks still answer."""
+    threading.Thread(target=run, name="warmup", daemon=True).start()
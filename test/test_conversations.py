@@ -1,7 +1,66 @@
+import contextlib
+
+import pytest
 from fastapi.testclient import TestClient
 
+from src import database as db
+from src import graph
+from src import vocabulary
 from src.api.server import app
 
+
+class _Borrowed:
+    """The test's connection, handed out without letting callers close it."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn
+
+    def __exit__(self, *exc):
+        pass
+
+    def close(self):
+        pass
+
+
+class _RollbackEngine:
+    """
+    Stands in for db.engine: every connection is the test's own, and each
+    begin() is a savepoint inside its outer transaction.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def connect(self):
+        return _Borrowed(self._conn)
+
+    @contextlib.contextmanager
+    def begin(self):
+        with self._conn.begin_nested():
+            yield self._conn
+
+
+@pytest.fixture(autouse=True)
+def rollback(monkeypatch):
+    """Runs each test in a transaction that is rolled back afterwards."""
+    with db.engine.connect() as conn:
+        transaction = conn.begin()
+        monkeypatch.setattr(db, "engine", _RollbackEngine(conn))
+        # Caches built during the test would hold the rolled-back rows.
+        monkeypatch.setattr(graph, "_graph", None)
+        monkeypatch.setattr(vocabulary, "_index", None)
+        try:
+            yield
+        finally:
+            transaction.rollback()
+
+
 conversation = {
   "character_1_id": 0,
   "character_2_id": 1,
@@ -33,3 +92,21 @@ def test_post_conversation():
 def test_post_invalid_conversation():
     response = client.post("/movies/0/conversations/", json = conversationB)
     assert response.status_code == 400
+
+
+def test_post_conversation_updates_vocabulary():
+    index = vocabulary.get_index()
+
+    def count():
+        counts = index.characters.get(1)
+        term_id = index.term_ids.get("zyzzyva")
+        return counts.terms[term_id] if counts and term_id is not None else 0
+
+    before = count()
+    response = client.post("/movies/0/conversations/", json={
+        "character_1_id": 0,
+        "character_2_id": 1,
+        "lines": [{"character_id": 1, "line_text": "zyzzyva"}]
+    })
+    assert response.status_code == 200
+    assert count() == before + 1
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src import database as db
+from src.api.server import app
+
+client = TestClient(app)
+
+
+def test_writes_pin_reads_to_primary():
+    assert not db.is_sticky("10.0.0.1")
+    db.mark_write("10.0.0.1")
+    assert db.is_sticky("10.0.0.1")
+    assert not db.is_sticky("10.0.0.2")
+
+
+def test_read_connection_without_replica_uses_primary():
+    if db.read_engine is not None:
+        pytest.skip("a read replica is configured")
+    before = db.replica_stats()["reads"]["primary"]
+    with db.read_connection() as conn:
+        assert conn.engine is db.engine
+    assert db.replica_stats()["reads"]["primary"] == before + 1
+
+
+def test_failed_write_does_not_pin_client(monkeypatch):
+    monkeypatch.setattr(db, "_sticky_until", {})
+    response = client.post(
+        "/movies/0/conversations/",
+        json={"character_1_id": 0, "character_2_id": 0, "lines": []},
+    )
+    assert response.status_code == 400
+    client.options("/movies/")
+    assert not db.is_sticky("testclient")
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+
+from src.api.server import app
+from src.graph import CharacterGraph
+
+client = TestClient(app)
+
+characters = [
+    (0, "BIANCA", 0, "F"),
+    (1, "CAMERON", 0, "M"),
+    (2, "MICHAEL", 0, "M"),
+    (3, "PATRICK", 0, "M"),
+    (4, "ALONE", 0, None),
+    (5, "OTHER", 1, "F"),
+]
+
+edges = [
+    (0, 1, 10),
+    (1, 0, 5),
+    (1, 2, 3),
+    (2, 3, 7),
+    (3, 5, 2),
+]
+
+
+def test_graph_neighbors():
+    graph = CharacterGraph(characters, edges)
+    assert graph.neighbors(1) == [(0, 15), (2, 3)]
+    assert graph.neighbors(4) == []
+
+
+def test_graph_shortest_path_stays_in_movie():
+    graph = CharacterGraph(characters, edges)
+    assert graph.shortest_path(0, 0, 3) == [0, 1, 2, 3]
+    assert graph.shortest_path(0, 0, 4) is None
+
+
+def test_graph_centrality():
+    graph = CharacterGraph(characters, edges)
+    ranking = graph.centrality(0, "weighted_degree")
+    assert ranking[0] == (1, 18)
+    # The (3, 5) edge leaves the movie, so it counts for neither metric.
+    assert dict(ranking)[3] == 7
+    degree = dict(graph.centrality(0, "degree"))
+    assert degree[1] == 2
+    assert degree[3] == 1
+
+
+def test_neighbors():
+    response = client.get("/characters/2/neighbors")
+    assert response.status_code == 200
+
+    lines_together = [n["number_of_lines_together"] for n in response.json()]
+    assert lines_together == sorted(lines_together, reverse=True)
+
+
+def test_neighbors_404():
+    response = client.get("/characters/-1/neighbors")
+    assert response.status_code == 404
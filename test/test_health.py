@@ -0,0 +1,58 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from src import warmup
+from src.api.server import app
+
+client = TestClient(app)
+
+
+def test_health():
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_ready_after_warmup():
+    warmup.run()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"]
+
+
+def test_warmup_retries_pool_and_skips_optional_steps(monkeypatch):
+    database_up = threading.Event()
+
+    def open_pool():
+        if not database_up.is_set():
+            raise ConnectionError("database unreachable")
+
+    def fill_cache():
+        raise ValueError("bad movie id")
+
+    monkeypatch.setattr(warmup, "ready", threading.Event())
+    monkeypatch.setattr(
+        warmup, "status", {"seconds": None, "failed_steps": [], "retrying": None}
+    )
+    monkeypatch.setattr(
+        warmup, "steps", lambda config: [("pool", open_pool), ("cache", fill_cache)]
+    )
+    config = {"enabled": True, "retry_seconds": 0.01}
+    thread = threading.Thread(target=warmup.run, args=(config,))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while warmup.status["retrying"] != "pool" and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["retrying"] == "pool"
+
+    database_up.set()
+    thread.join()
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["failed_steps"] == ["cache"]
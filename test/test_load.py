@@ -0,0 +1,94 @@
+import io
+
+import pytest
+
+from src import load as loader
+from src.load import chunks, copy_table, csv_value, read_ndjson
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.statements.append(sql.strip())
+
+    def copy_expert(self, sql, f, size=8192):
+        if self.conn.fail_copy:
+            raise RuntimeError("copy failed")
+        self.conn.copied.append((sql, f.read()))
+        self.rowcount = 2
+
+
+class FakeConnection:
+    def __init__(self, fail_copy=False):
+        self.fail_copy = fail_copy
+        self.statements = []
+        self.copied = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_read_ndjson_rows():
+    f = io.StringIO('{"line_id": 1}\n\n{"line_id": 2, "line_text": "hi"}\n')
+    columns, rows = read_ndjson(f)
+    assert columns == ["line_id", "line_text"]
+    assert list(rows) == [[1, None], [2, "hi"]]
+
+
+def test_csv_value_keeps_empty_strings_apart_from_null():
+    assert csv_value(None) == ""
+    assert csv_value("") == '""'
+    assert csv_value('say "hi"') == '"say ""hi"""'
+    assert csv_value(7) == "7"
+    assert csv_value({"a": [1]}) == '"{""a"": [1]}"'
+
+
+def test_chunks():
+    assert list(chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_copy_csv_streams_file_unchanged(tmp_path):
+    path = tmp_path / "lines.csv"
+    path.write_text('line_id,line_text\n1,""\n2,\n', encoding="utf-8")
+    conn = FakeConnection()
+    assert copy_table(conn.cursor(), "lines", path, "csv", 10) == 2
+    assert conn.copied == [
+        (
+            "COPY lines (line_id, line_text) FROM STDIN WITH (FORMAT csv)",
+            '1,""\n2,\n',
+        )
+    ]
+
+
+def test_copy_csv_drops_byte_order_mark(tmp_path):
+    path = tmp_path / "movies.csv"
+    path.write_text("\ufeffmovie_id,title\n0,x\n", encoding="utf-8")
+    conn = FakeConnection()
+    copy_table(conn.cursor(), "movies", path, "csv", 10)
+    assert conn.copied[0][0].startswith("COPY movies (movie_id, title)")
+
+
+def test_failed_load_keeps_indexes(tmp_path):
+    (tmp_path / "movies.csv").write_text("movie_id,title\n0,x\n", encoding="utf-8")
+    conn = FakeConnection(fail_copy=True)
+    with pytest.raises(RuntimeError):
+        loader.load(conn, str(tmp_path))
+
+    assert not [s for s in conn.statements if s.startswith("DROP INDEX")]
+    created = [s for s in conn.statements if s.startswith("CREATE INDEX")]
+    assert len(created) == len(loader.INDEXES)
@@ -0,0 +1,120 @@
+"""
+Query-plan regression tests for the SQL behind each route.
+
+Every statement is run under EXPLAIN (FORMAT JSON) and fails if the planner
+uses any sequential scan of `lines` while that table holds more than
+QUERY_PLAN_MAX_SEQ_ROWS rows, or if the estimated total cost exceeds
+QUERY_PLAN_MAX_COST. They need a seeded database (see
+`python -m src.load`) and only run when QUERY_PLAN_TESTS=1.
+"""
+import os
+
+import pytest
+import sqlalchemy
+
+from src import database as db
+from src.api import characters, movies
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("QUERY_PLAN_TESTS") != "1",
+    reason="set QUERY_PLAN_TESTS=1 to check query plans",
+)
+
+MAX_SEQ_ROWS = int(os.environ.get("QUERY_PLAN_MAX_SEQ_ROWS", "1000"))
+MAX_COST = float(os.environ.get("QUERY_PLAN_MAX_COST", "50000"))
+
+# Sorting every character by line count has to count all of `lines` before
+# it can page, so that one case, with no name filter, may scan the table. It
+# is still held to its own cost ceiling. Filtered list_characters cases can
+# drive the lines lookup from the matching characters, so they get the scan
+# check like everything else.
+FULL_SCAN_MAX_COST = float(os.environ.get("QUERY_PLAN_FULL_SCAN_MAX_COST", "200000"))
+
+text_cases = [
+    ("get_movie", movies.MOVIE_SQL, {"movie_id": 44}, False),
+    ("get_character", characters.CHARACTER_SQL, {"id": 7421}, False),
+    ("top_conversations", characters.TOP_CONVERSATIONS_SQL, {"id": 7421}, False),
+] + [
+    (
+        f"list_characters sort={sort.value} name='amy'",
+        characters.list_characters_sql(sort),
+        {"name": "%amy%", "b": 50, "c": 0},
+        False,
+    )
+    for sort in characters.character_sort_options
+] + [
+    (
+        "list_characters sort=number_of_lines name=''",
+        characters.list_characters_sql(
+            characters.character_sort_options.number_of_lines
+        ),
+        {"name": "%%", "b": 50, "c": 0},
+        True,
+    )
+]
+
+stmt_cases = [
+    (f"list_movies sort={sort.value} name={name!r}", (name, 50, 0, sort))
+    for sort in movies.movie_sort_options
+    for name in ("", "big")
+]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+@pytest.fixture(scope="module")
+def lines_rows():
+    """
+    Planner's estimate of the size of `lines` from pg_class, or an exact
+    count if the table has never been analyzed (reltuples is -1).
+    """
+    sql = """
+    SELECT CASE WHEN reltuples < 0 THEN (SELECT COUNT(*) FROM lines)
+        ELSE reltuples END
+    FROM pg_class WHERE relname = 'lines'
+    """
+    with db.engine.connect() as conn:
+        return conn.execute(sqlalchemy.text(sql)).scalar()
+
+
+def check_plan(explained, lines_rows, full_scan):
+    plan = explained[0]["Plan"]
+    # "Plan Rows" is what a scan returns after its filter, not what it reads,
+    # so the table size decides whether a sequential scan is acceptable.
+    if not full_scan and lines_rows > MAX_SEQ_ROWS:
+        for node in plan_nodes(plan):
+            assert not (
+                node["Node Type"] == "Seq Scan" and node["Relation Name"] == "lines"
+            ), f"sequential scan on lines ({lines_rows:.0f} rows)"
+    max_cost = FULL_SCAN_MAX_COST if full_scan else MAX_COST
+    assert plan["Total Cost"] <= max_cost, f"estimated cost {plan['Total Cost']}"
+
+
+@pytest.mark.parametrize(
+    "sql,params,full_scan",
+    [case[1:] for case in text_cases],
+    ids=[case[0] for case in text_cases],
+)
+def test_text_query_plan(sql, params, full_scan, lines_rows):
+    with db.engine.connect() as conn:
+        explained = conn.execute(
+            sqlalchemy.text("EXPLAIN (FORMAT JSON) " + sql), params
+        ).scalar()
+    check_plan(explained, lines_rows, full_scan)
+
+
+@pytest.mark.parametrize(
+    "args", [case[1] for case in stmt_cases], ids=[case[0] for case in stmt_cases]
+)
+def test_list_movies_query_plan(args, lines_rows):
+    stmt = movies.list_movies_stmt(*args)
+    with db.engine.connect() as conn:
+        compiled = stmt.compile(dialect=conn.dialect)
+        explained = conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+        ).scalar()
+    check_plan(explained, lines_rows, False)
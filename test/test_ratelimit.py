@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import threading
+import time
+
+from src.ratelimit import MemoryBackend, RateLimiter, backend_from_env, request_cost
+
+
+def test_request_cost():
+    assert request_cost("GET", "/characters/7421", {}) == 1
+    assert request_cost("GET", "/characters/", {}) == 3
+    assert request_cost("GET", "/characters/", {"sort": "number_of_lines"}) == 10
+    assert request_cost("GET", "/movies/", {}) == 3
+
+
+def test_bucket_rejects_with_retry_after():
+    limiter = RateLimiter(MemoryBackend(), rate=1, burst=10, concurrency=4)
+    expensive = {"sort": "number_of_lines"}
+    assert limiter.admit("a", "GET", "/characters/", expensive) is None
+    limiter.release("a")
+    assert limiter.admit("a", "GET", "/characters/", expensive) >= 9
+    assert limiter.admit("b", "GET", "/characters/", expensive) is None
+    assert limiter.stats()["rejected"]["rate"] == 1
+
+
+def test_concurrency_cap():
+    limiter = RateLimiter(MemoryBackend(), rate=100, burst=100, concurrency=2)
+    assert limiter.admit("a", "GET", "/movies/44", {}) is None
+    assert limiter.admit("a", "GET", "/movies/44", {}) is None
+    assert limiter.admit("a", "GET", "/movies/44", {}) == 1
+    limiter.release("a")
+    assert limiter.admit("a", "GET", "/movies/44", {}) is None
+
+
+def test_concurrency_rejection_keeps_rate_budget():
+    limiter = RateLimiter(MemoryBackend(), rate=0.001, burst=3, concurrency=1)
+    assert limiter.admit("a", "GET", "/movies/44", {}) is None
+    for _ in range(5):
+        assert limiter.admit("a", "GET", "/movies/44", {}) == 1
+    limiter.release("a")
+    assert limiter.admit("a", "GET", "/movies/44", {}) is None
+    limiter.release("a")
+    assert limiter.stats()["rejected"] == {"rate": 0, "concurrency": 5}
+
+
+def test_idle_full_buckets_are_evicted():
+    backend = MemoryBackend()
+    backend.SWEEP_SECONDS = 0
+    backend.take("a", 1, 1000, 10)
+    time.sleep(0.02)
+    backend.take("b", 1, 1000, 10)
+    assert list(backend._buckets) == ["b"]
+
+
+def test_missing_redis_package_falls_back_to_memory(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "redis", None)
+    assert isinstance(backend_from_env(), MemoryBackend)
+
+
+def test_blocking_backend_runs_off_the_event_loop():
+    class BlockingBackend(MemoryBackend):
+        blocking = True
+        threads = set()
+
+        def acquire(self, client, limit):
+            self.threads.add(threading.get_ident())
+            return super().acquire(client, limit)
+
+    limiter = RateLimiter(BlockingBackend(), rate=10, burst=10, concurrency=1)
+
+    async def request():
+        assert await limiter.admit_async("a", "GET", "/movies/44", {}) is None
+        await limiter.release_async("a")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(request())
+    assert loop_thread not in BlockingBackend.threads
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from src import database as db
+from src import singleflight
+from src.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def query():
+        calls.append(1)
+        release.wait()
+        return ["movie"]
+
+    def request():
+        results.append(group.do(("get_movie", (44,), ()), query))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while group.stats()["routes"].get("get_movie", {}).get("coalesced", 0) < 4:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["movie"]] * 5
+    assert group.stats()["routes"]["get_movie"] == {"executed": 1, "coalesced": 4}
+    assert group.stats()["in_flight"] == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    group = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    for _ in range(2):
+        try:
+            group.do(("get_character", (1,), ()), fail)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+    assert group.stats()["routes"]["get_character"]["executed"] == 2
+
+
+def test_requests_pinned_to_primary_are_not_coalesced_with_replica_reads():
+    release = threading.Event()
+    calls = []
+
+    @singleflight.coalesce
+    def get_movie(movie_id):
+        calls.append(db.prefer_primary.get())
+        release.wait()
+        return db.prefer_primary.get()
+
+    results = {}
+
+    def request(name, pinned):
+        db.prefer_primary.set(pinned)
+        results[name] = get_movie(44)
+
+    replica = threading.Thread(target=request, args=("replica", False))
+    replica.start()
+    while not calls:
+        time.sleep(0.001)
+    pinned = threading.Thread(target=request, args=("pinned", True))
+    pinned.start()
+    # A pinned request that wrongly joined the replica read never calls.
+    deadline = time.monotonic() + 1
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    replica.join()
+    pinned.join()
+
+    assert sorted(calls) == [False, True]
+    assert results == {"replica": False, "pinned": True}
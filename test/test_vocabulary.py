@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+
+from src import vocabulary
+from src.api.server import app
+from src.vocabulary import VocabularyIndex, tokenize
+
+client = TestClient(app)
+
+
+def test_tokenize():
+    assert tokenize("I'm gonna KISS you -- Bianca!") == [
+        "i'm",
+        "gonna",
+        "kiss",
+        "you",
+        "bianca",
+    ]
+    assert tokenize("Ça va, naïve? Café.") == ["ça", "va", "naïve", "café"]
+
+
+def test_index_top_terms_and_bigrams():
+    index = VocabularyIndex()
+    index.add_line(0, 0, "Bianca, the prom is tonight.")
+    index.add_line(0, 0, "The prom! The prom is over.")
+    index.add_line(1, 0, "Forget the prom.")
+
+    top = index.top(index.characters, 0, 2)
+    assert top["terms"] == [
+        {"term": "prom", "count": 3},
+        {"term": "bianca", "count": 1},
+    ]
+    assert top["bigrams"][0] == {"bigram": "the prom", "count": 3}
+    assert index.top(index.movies, 0, 1)["terms"] == [{"term": "prom", "count": 4}]
+    assert index.top(index.characters, 2, 1) is None
+
+
+def test_character_vocabulary():
+    response = client.get("/characters/2/vocabulary?limit=5")
+    assert response.status_code == 200
+
+    counts = [t["count"] for t in response.json()["terms"]]
+    assert len(counts) <= 5
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_movie_vocabulary_404():
+    response = client.get("/movies/-1/vocabulary")
+    assert response.status_code == 404
+
+
+def test_add_lines_updates_built_index_only(monkeypatch):
+    monkeypatch.setattr(vocabulary, "_index", None)
+    vocabulary.add_lines(0, [(10, 0, "zyzzyva")])
+    assert vocabulary._index is None
+
+    index = VocabularyIndex()
+    monkeypatch.setattr(vocabulary, "_index", index)
+    vocabulary.add_lines(0, [(10, 0, "zyzzyva zyzzyva"), (11, 1, "zyzzyva")])
+    assert index.top(index.characters, 0, 1)["terms"] == [
+        {"term": "zyzzyva", "count": 2}
+    ]
+    assert index.top(index.movies, 0, 1)["terms"] == [
+        {"term": "zyzzyva", "count": 3}
+    ]
+
+
+def test_add_lines_skips_lines_the_build_read():
+    index = VocabularyIndex()
+    index.add_line(0, 0, "zyzzyva")
+    index.watermark = 10
+    index.add_lines(0, [(10, 0, "zyzzyva"), (11, 0, "zyzzyva")])
+    assert index.top(index.characters, 0, 1)["terms"] == [
+        {"term": "zyzzyva", "count": 2}
+    ]
+    assert index.watermark == 11
+
+
+def test_lines_written_during_build_are_counted_once(monkeypatch):
+    def load_index():
+        # Line 5 is in the build's snapshot, line 6 committed after it.
+        index = VocabularyIndex()
+        index.add_line(0, 0, "zyzzyva")
+        index.watermark = 5
+        vocabulary.add_lines(0, [(5, 0, "zyzzyva")])
+        vocabulary.add_lines(0, [(6, 0, "zyzzyva")])
+        return index
+
+    monkeypatch.setattr(vocabulary, "_index", None)
+    monkeypatch.setattr(vocabulary, "load_index", load_index)
+    index = vocabulary.get_index()
+    assert index.top(index.characters, 0, 1)["terms"] == [
+        {"term": "zyzzyva", "count": 2}
+    ]
+    assert vocabulary._pending is None
+
+
+def test_character_without_lines_gets_empty_vocabulary(monkeypatch):
+    monkeypatch.setattr(vocabulary, "_index", VocabularyIndex())
+    response = client.get("/characters/2/vocabulary")
+    assert response.status_code == 200
+    assert response.json() == {"character_id": 2, "terms": [], "bigrams": []}